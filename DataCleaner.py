@@ -1,25 +1,34 @@
 import pandas as pd
 import re
 
+# Keywords for contrast extraction
+_KEYWORDS = frozenset({'w', 'wo', 'with', 'without', 'wo/w'})
+
+# CT types for exam extraction
+_CT_TYPES = frozenset({"angiography", "arthrography", "enterography", "fistulogram",
+                       "urography", "venography", "quantitative", 'scan'})
+
 class DataCleaner:
     """
     A class to clean and format medical examination data.
     
     Attributes:
     ----------
-    keywords : list
-        List of keywords used to identify contrast details in referrals.
-    ct_types : list
-        List of CT types to identify specific CT-related medical examinations.
+    keywords : frozenset
+        Set of keywords used to identify contrast details in referrals.
+    ct_types : frozenset
+        Set of CT types to identify specific CT-related medical examinations.
     """
 
+    # Compiled once and shared by all instances
+    _REC_RE = re.compile(r"(?:Recommendation|Exam):\s*([^.\n]+)", re.IGNORECASE)
+
     def __init__(self):
         """
         Initializes DataCleaner with specific keywords and CT types.
         """
-        self.keywords = ['w', 'wo', 'with', 'without','wo/w']
-        self.ct_types = ["angiography", "arthrography", "enterography", "fistulogram", 
-                         "urography", "venography", "quantitative",'scan']
+        self.keywords = _KEYWORDS
+        self.ct_types = _CT_TYPES
 
     def clean_recommendation(self, text):
         """
@@ -35,9 +44,9 @@ class DataCleaner:
         str
             The cleaned recommendation or referral.
         """
-        match = re.search(r"(Recommendation|Exam):\s*([^.\n]+)", text, re.IGNORECASE)
+        match = self._REC_RE.search(text)
         if match:
-            return match.group(2).strip()
+            return match.group(1).strip()
         else:
             return text.replace("\n", " ").strip().rstrip('.')
         
@@ -54,48 +63,41 @@ class DataCleaner:
         -------
         list
             A list containing three elements: the exam type, the body part, and the contrast details.
-            If parsing fails, returns a list of None values.
+            If the row is not a string, returns a list of None values.
         """
         if not isinstance(row, str):
             return [None, None, None]
         
-        try:
-            # Split and clean elements from the referral text
-            elements = row.split(' ')
-            elements = [s.strip().replace(',', '') for s in elements]
-
-            # Identify the exam type
-            ct_index = None
-            for index, element in enumerate(elements):
-                if element in self.ct_types:
-                    ct_index = index
-                    break
-
-            if ct_index is not None:
-                exam = ' '.join(elements[:ct_index + 1])
-            else:
-                exam = elements[0]
-                ct_index = 0
-
-            other_elements = elements[ct_index + 1:]
-            body_part, contrast, keyword_index = None, None, None
-
-            # Extract the body part and contrast details
-            for index, element in enumerate(other_elements):
-                if element in self.keywords:
+        # Split and clean elements from the referral text, locating in the same pass
+        # the first CT type, the first keyword after it, and the first keyword after
+        # the first element (used when there is no CT type)
+        elements = []
+        ct_index = keyword_index = fallback_keyword_index = -1
+        for index, element in enumerate(row.split(' ')):
+            element = element.strip().replace(',', '')
+            elements.append(element)
+            if ct_index < 0 and element in _CT_TYPES:
+                ct_index = index
+            elif keyword_index < 0 and element in _KEYWORDS:
+                if ct_index >= 0:
                     keyword_index = index
-                    break
-
-            if keyword_index is not None:
-                body_part = ' '.join(other_elements[:keyword_index])
-                contrast = ' '.join(other_elements[keyword_index:])
-            else:
-                body_part = ' '.join(other_elements)
+                elif fallback_keyword_index < 0 and index > 0:
+                    fallback_keyword_index = index
+
+        # Identify the exam type, defaulting to the first element
+        if ct_index < 0:
+            ct_index, keyword_index = 0, fallback_keyword_index
+        exam = ' '.join(elements[:ct_index + 1])
+
+        # Extract the body part and contrast details
+        if keyword_index >= 0:
+            body_part = ' '.join(elements[ct_index + 1:keyword_index])
+            contrast = ' '.join(elements[keyword_index:])
+        else:
+            body_part = ' '.join(elements[ct_index + 1:])
+            contrast = None
 
-            return [exam, body_part, contrast]
-        
-        except Exception:
-            return [None, None, None]
+        return [exam, body_part, contrast]
     
     def apply_cleaning_to_dataframe(self, df, column_name):
         """
@@ -113,7 +115,11 @@ class DataCleaner:
         pd.Series
             The cleaned recommendations as a pandas Series.
         """
-        return df[column_name].apply(self.clean_recommendation)
+        column = df[column_name]
+        # Same rules as clean_recommendation, run column-wise by pandas' string methods
+        extracted = column.str.extract(self._REC_RE, expand=False).str.strip()
+        fallback = column.str.replace('\n', ' ', regex=False).str.strip().str.rstrip('.')
+        return extracted.fillna(fallback)
     
     def apply_formatting_to_dataframe(self, df, column_name):
         """
@@ -131,7 +137,10 @@ class DataCleaner:
         pd.DataFrame
             The formatted DataFrame with 'Exam', 'Body Part', and 'Contrast' columns.
         """
-        return df.apply(lambda x: pd.Series(self.format_referral(x[column_name])), axis=1)
+        results = [self.format_referral(row) for row in df[column_name].to_numpy()]
+        exams, body_parts, contrasts = zip(*results) if results else ((), (), ())
+        return pd.DataFrame({'Exam': list(exams), 'Body Part': list(body_parts), 'Contrast': list(contrasts)},
+                            index=df.index)
     
     def check_columns(self, df, required_columns):
         """
@@ -1,5 +1,15 @@
+import numpy as np
 import pandas as pd
 import re
+from concurrent.futures import ProcessPoolExecutor
+from itertools import repeat
+
+# Keywords for contrast extraction
+_KEYWORDS = frozenset({'w', 'wo', 'with', 'without', 'wo/w'})
+
+# CT types for exam extraction
+_CT_TYPES = frozenset({"angiography", "arthrography", "enterography", "fistulogram",
+                       "urography", "venography", "quantitative", 'scan'})
 
 class MedicalDataProcessor:
     """
@@ -7,29 +17,35 @@ class MedicalDataProcessor:
     
     Attributes:
     ----------
-    keywords : list
-        List of keywords used to identify contrast details in referrals.
-    ct_types : list
-        List of CT types to identify specific CT-related medical examinations.
+    keywords : frozenset
+        Set of keywords used to identify contrast details in referrals.
+    ct_types : frozenset
+        Set of CT types to identify specific CT-related medical examinations.
     exam_categories : dict
         Dictionary mapping medical exam categories to associated terms.
     organ_clusters : dict
         Dictionary mapping organ clusters to associated terms.
-    contrast_standardization_map : dict
-        Dictionary mapping various contrast descriptions to standardized terms.
+    cluster_tokens : dict
+        Dictionary mapping organ clusters to their binary flag.
+    categories_to_flags : dict
+        Dictionary mapping exam categories to their binary flag.
+    contrast_categories : list
+        Standardized contrast descriptions, ordered by their binary flag.
     """
 
+    # Compiled once and shared by all instances
+    _REC_RE = re.compile(r"(?:Recommendation|Exam):\s*([^.\n]+)", re.IGNORECASE)
+    _HYPHEN_RE = re.compile(r"-")
+    _PUNCT_RE = re.compile(r"[^\w\s]")
+
     def __init__(self):
         """
         Initializes MedicalDataProcessor with specific keywords, CT types, exam categories,
-        organ clusters, and contrast standardization map.
+        organ clusters, and their binary flag positions.
         """
-        # Keywords for contrast extraction
-        self.keywords = ['w', 'wo', 'with', 'without','wo/w']
-
-        # CT types for exam extraction
-        self.ct_types = ["angiography", "arthrography", "enterography", "fistulogram", 
-                         "urography", "venography", "quantitative",'scan']
+        # Keywords and CT types shared by all instances
+        self.keywords = _KEYWORDS
+        self.ct_types = _CT_TYPES
 
         # Exam categories for binary flagging
         self.exam_categories = {
@@ -75,16 +91,85 @@ class MedicalDataProcessor:
                      "vascular region", "vascular system", "arterial system"]
         }
 
-        # Contrast standardization map
-        self.contrast_standardization_map = {
-            'with iv contrast ': 'with iv contrast', 
-            'without iv contrast ': 'without iv contrast',
-            ' with iv contrast': 'with iv contrast',
-            ' with or without iv contrast':'with or without iv contrast', 
-            ' without iv contrast': 'without iv contrast',
-            'with or without iv contrast ':'with or without iv contrast',
+        # Binary positions for each organ cluster
+        self.cluster_tokens = {
+            "head": 1 << 0, "neck": 1 << 1, "thorax": 1 << 2, "abdomen_pelvis": 1 << 3,
+            "upper_extremities": 1 << 4, "lower_extremities": 1 << 5, "spine": 1 << 6,
+            "skeletal": 1 << 7, "lymphatic": 1 << 8, "body": 1 << 9
+        }
+
+        # Binary positions for each exam category
+        self.categories_to_flags = {
+            'CT Scans': 1 << 0,
+            'MRI': 1 << 1,
+            'Ultrasound and Doppler Studies': 1 << 2,
+            'Radiography and X-Ray': 1 << 3,
+            'Nuclear Medicine': 1 << 4,
+            'Invasive and Interventional Procedures': 1 << 5,
+            'Cardiovascular Specific Exams': 1 << 6,
+            'Health Check-ups and Other Exams': 1 << 7
         }
 
+        # Standardized contrast descriptions, in binary flag order
+        self.contrast_categories = ['without iv contrast', 'with iv contrast', 'with or without iv contrast']
+
+        # Term flag lookups and fused matchers for multi-word terms
+        self._organ_term_bits, self._organ_regex = self._build_term_matcher(self.organ_clusters, self.cluster_tokens)
+        self._exam_term_bits, self._exam_regex = self._build_term_matcher(self.exam_categories, self.categories_to_flags)
+
+        # The same flag tables as arrays indexed by term id, for flagging whole columns, using the
+        # narrowest unsigned dtype that holds every flag bit (uint16 for organs, uint8 for exams)
+        self._organ_term_index = pd.Index(list(self._organ_term_bits))
+        self._organ_flag_table = np.fromiter(self._organ_term_bits.values(),
+                                             dtype=np.min_scalar_type(sum(self.cluster_tokens.values())))
+        self._exam_term_index = pd.Index(list(self._exam_term_bits))
+        self._exam_flag_table = np.fromiter(self._exam_term_bits.values(),
+                                            dtype=np.min_scalar_type(sum(self.categories_to_flags.values())))
+
+    @staticmethod
+    def _build_term_matcher(groups, flags):
+        """
+        Builds the lookups used to find the terms of every group in cleaned text.
+
+        Cleaned text only holds words and whitespace, so a single-word term matches exactly when
+        it is one of the text's tokens and is looked up by token. Multi-word terms are matched by
+        one regex, a word-bounded lookahead, so ``finditer`` reports the longest term starting at
+        every word boundary, including terms nested inside a longer match. Each multi-word term's
+        bits also include those of the shorter terms it starts with, which would match at the same
+        position.
+
+        Parameters:
+        ----------
+        groups : dict
+            Dictionary mapping group names to associated terms.
+        flags : dict
+            Dictionary mapping group names to their binary flag.
+
+        Returns:
+        -------
+        tuple
+            A dictionary mapping each term to its binary flag, and the compiled regex for
+            multi-word terms.
+        """
+        term_bits = {}
+        for group, terms in groups.items():
+            for term in terms:
+                term_bits[term] = term_bits.get(term, 0) | flags[group]
+
+        phrases = [term for term in term_bits if ' ' in term]
+        prefix_bits = {}
+        for term in phrases:
+            bits = 0
+            for other, other_bits in term_bits.items():
+                if term.startswith(other) and (len(term) == len(other) or not re.match(r"\w", term[len(other)])):
+                    bits |= other_bits
+            prefix_bits[term] = bits
+        term_bits.update(prefix_bits)
+
+        ordered = sorted(phrases, key=len, reverse=True)
+        regex = re.compile(r"\b(?=(" + "|".join(re.escape(t) for t in ordered) + r")\b)")
+        return term_bits, regex
+
     def clean_recommendation(self, text):
         """
         Extracts and cleans recommendation text based on specific keywords.
@@ -99,9 +184,9 @@ class MedicalDataProcessor:
         str
             The cleaned recommendation or referral.
         """
-        match = re.search(r"(Recommendation|Exam):\s*([^.\n]+)", text, re.IGNORECASE)
+        match = self._REC_RE.search(text)
         if match:
-            return match.group(2).strip()
+            return match.group(1).strip()
         else:
             return text.replace("\n", " ").strip().rstrip('.')
         
@@ -118,48 +203,41 @@ class MedicalDataProcessor:
         -------
         list
             A list containing three elements: the exam type, the body part, and the contrast details.
-            If parsing fails, returns a list of None values.
+            If the row is not a string, returns a list of None values.
         """
         if not isinstance(row, str):
             return [None, None, None]
         
-        try:
-            # Split and clean elements from the referral text
-            elements = row.split(' ')
-            elements = [s.strip().replace(',', '') for s in elements]
-
-            # Identify the exam type
-            ct_index = None
-            for index, element in enumerate(elements):
-                if element in self.ct_types:
-                    ct_index = index
-                    break
-
-            if ct_index is not None:
-                exam = ' '.join(elements[:ct_index + 1])
-            else:
-                exam = elements[0]
-                ct_index = 0
-
-            other_elements = elements[ct_index + 1:]
-            body_part, contrast, keyword_index = None, None, None
-
-            # Extract the body part and contrast details
-            for index, element in enumerate(other_elements):
-                if element in self.keywords:
+        # Split and clean elements from the referral text, locating in the same pass
+        # the first CT type, the first keyword after it, and the first keyword after
+        # the first element (used when there is no CT type)
+        elements = []
+        ct_index = keyword_index = fallback_keyword_index = -1
+        for index, element in enumerate(row.split(' ')):
+            element = element.strip().replace(',', '')
+            elements.append(element)
+            if ct_index < 0 and element in _CT_TYPES:
+                ct_index = index
+            elif keyword_index < 0 and element in _KEYWORDS:
+                if ct_index >= 0:
                     keyword_index = index
-                    break
-
-            if keyword_index is not None:
-                body_part = ' '.join(other_elements[:keyword_index])
-                contrast = ' '.join(other_elements[keyword_index:])
-            else:
-                body_part = ' '.join(other_elements)
+                elif fallback_keyword_index < 0 and index > 0:
+                    fallback_keyword_index = index
+
+        # Identify the exam type, defaulting to the first element
+        if ct_index < 0:
+            ct_index, keyword_index = 0, fallback_keyword_index
+        exam = ' '.join(elements[:ct_index + 1])
+
+        # Extract the body part and contrast details
+        if keyword_index >= 0:
+            body_part = ' '.join(elements[ct_index + 1:keyword_index])
+            contrast = ' '.join(elements[keyword_index:])
+        else:
+            body_part = ' '.join(elements[ct_index + 1:])
+            contrast = None
 
-            return [exam, body_part, contrast]
-        
-        except Exception:
-            return [None, None, None]
+        return [exam, body_part, contrast]
     
     def apply_cleaning_to_dataframe(self, df, column_name):
         """
@@ -177,7 +255,11 @@ class MedicalDataProcessor:
         pd.Series
             The cleaned recommendations as a pandas Series.
         """
-        return df[column_name].apply(self.clean_recommendation)
+        column = df[column_name]
+        # Same rules as clean_recommendation, run column-wise by pandas' string methods
+        extracted = column.str.extract(self._REC_RE, expand=False).str.strip()
+        fallback = column.str.replace('\n', ' ', regex=False).str.strip().str.rstrip('.')
+        return extracted.fillna(fallback)
     
     def apply_formatting_to_dataframe(self, df, column_name):
         """
@@ -195,7 +277,10 @@ class MedicalDataProcessor:
         pd.DataFrame
             The formatted DataFrame with 'Exam', 'Body Part', and 'Contrast' columns.
         """
-        return df.apply(lambda x: pd.Series(self.format_referral(x[column_name])), axis=1)
+        results = [self.format_referral(row) for row in df[column_name].to_numpy()]
+        exams, body_parts, contrasts = zip(*results) if results else ((), (), ())
+        return pd.DataFrame({'Exam': list(exams), 'Body Part': list(body_parts), 'Contrast': list(contrasts)},
+                            index=df.index)
 
     def tokenize_and_flag_organs(self, phrase):
         """
@@ -213,17 +298,13 @@ class MedicalDataProcessor:
         """
         if pd.isna(phrase):
             return None
-        cleaned_phrase = re.sub(r"-", " ", str(phrase))
-        cleaned_phrase = re.sub(r"[^\w\s]", "", cleaned_phrase.lower())
+        cleaned_phrase = self._HYPHEN_RE.sub(" ", str(phrase))
+        cleaned_phrase = self._PUNCT_RE.sub("", cleaned_phrase.lower())
         binary_flag = 0
-        cluster_tokens = {
-            "head": 1 << 0, "neck": 1 << 1, "thorax": 1 << 2, "abdomen_pelvis": 1 << 3,
-            "upper_extremities": 1 << 4, "lower_extremities": 1 << 5, "spine": 1 << 6,
-            "skeletal": 1 << 7, "lymphatic": 1 << 8, "body": 1 << 9
-        }
-        for cluster, terms in self.organ_clusters.items():
-            if any(re.search(r"\b" + re.escape(term) + r"\b", cleaned_phrase) for term in terms):
-                binary_flag |= cluster_tokens[cluster]
+        for token in cleaned_phrase.split():
+            binary_flag |= self._organ_term_bits.get(token, 0)
+        for match in self._organ_regex.finditer(cleaned_phrase):
+            binary_flag |= self._organ_term_bits[match.group(1)]
         return binary_flag
 
     def map_exam_to_binary_flag(self, exam_name):
@@ -242,32 +323,22 @@ class MedicalDataProcessor:
         """
         if pd.isna(exam_name):
             return None  # Return None for missing values
-        cleaned_exam = re.sub(r"-", " ", str(exam_name))  # Replace hyphens with spaces
-        cleaned_exam = re.sub(r"[^\w\s]", "", cleaned_exam.lower())  # Remove punctuation and convert to lower case
+        cleaned_exam = self._HYPHEN_RE.sub(" ", str(exam_name))  # Replace hyphens with spaces
+        cleaned_exam = self._PUNCT_RE.sub("", cleaned_exam.lower())  # Remove punctuation and convert to lower case
         
         binary_flag = 0
-        # Define binary positions for each exam category
-        categories_to_flags = {
-            'CT Scans': 1 << 0,
-            'MRI': 1 << 1,
-            'Ultrasound and Doppler Studies': 1 << 2,
-            'Radiography and X-Ray': 1 << 3,
-            'Nuclear Medicine': 1 << 4,
-            'Invasive and Interventional Procedures': 1 << 5,
-            'Cardiovascular Specific Exams': 1 << 6,
-            'Health Check-ups and Other Exams': 1 << 7
-        }
-        
-        # Check each category for matching terms in the exam description
-        for category, flag in categories_to_flags.items():
-            if any(re.search(r"\b" + re.escape(term) + r"\b", cleaned_exam) for term in self.exam_categories[category]):
-                binary_flag |= flag
+        # Collect the categories of every term found in the exam description
+        for token in cleaned_exam.split():
+            binary_flag |= self._exam_term_bits.get(token, 0)
+        for match in self._exam_regex.finditer(cleaned_exam):
+            binary_flag |= self._exam_term_bits[match.group(1)]
 
         return binary_flag
 
     def standardize_contrast(self, column):
         """
-        Applies standardization to contrast descriptions.
+        Applies standardization to contrast descriptions by trimming surrounding whitespace
+        and lower-casing them.
 
         Parameters:
         ----------
@@ -279,12 +350,16 @@ class MedicalDataProcessor:
         pd.Series
             The standardized contrast data as a pandas Series.
         """
-        return column.map(self.contrast_standardization_map).fillna(column)
+        return column.astype('string').str.strip().str.lower()
 
     def encode_binary_flags_contrast(self, df, column):
         """
         Encodes contrast descriptions into binary flags.
 
+        The column is converted to a categorical whose category order defines the flags:
+        0 for without, 1 for with, and 2 for with or without iv contrast. Unrecognized or
+        missing descriptions are flagged -1.
+
         Parameters:
         ----------
         df : pd.DataFrame
@@ -297,13 +372,11 @@ class MedicalDataProcessor:
         None
             Modifies the DataFrame in place to include a new column with binary flags.
         """
-        df[column + '_flags'] = df[column].map({
-            'with iv contrast': 1,
-            'without iv contrast': 0,
-            'with or without iv contrast': 2  # or another suitable encoding
-        })
+        contrast = pd.Categorical(df[column], categories=self.contrast_categories)
+        df[column] = contrast
+        df[column + '_flags'] = contrast.codes.astype('int8')
 
-    def process_data(self, df, exam_column, organ_column, contrast_column):
+    def process_data(self, df, exam_column, organ_column, contrast_column, n_jobs=1):
         """
         Applies the entire processing pipeline to a DataFrame.
 
@@ -317,17 +390,25 @@ class MedicalDataProcessor:
             The name of the column containing organ/body part data.
         contrast_column : str
             The name of the column containing contrast data.
+        n_jobs : int, optional
+            Number of worker processes. Above 1, the DataFrame is split into one chunk of rows
+            per worker and each chunk runs the whole pipeline in its own process.
 
         Returns:
         -------
         pd.DataFrame
             The processed DataFrame with binary flag columns added.
         """
+        if n_jobs > 1 and len(df) > 1:
+            return self._process_data_parallel(df, exam_column, organ_column, contrast_column, n_jobs)
+
         # Apply exam binary flags
-        df[exam_column + '_flags'] = df[exam_column].apply(self.map_exam_to_binary_flag)
+        df[exam_column + '_flags'] = self._flag_column(df[exam_column], self._exam_term_index,
+                                                       self._exam_flag_table, self._exam_regex)
 
         # Apply organ binary flags
-        df[organ_column + '_flags'] = df[organ_column].apply(self.tokenize_and_flag_organs)
+        df[organ_column + '_flags'] = self._flag_column(df[organ_column], self._organ_term_index,
+                                                        self._organ_flag_table, self._organ_regex)
 
         # Apply contrast standardization and binary flags
         df[contrast_column] = self.standardize_contrast(df[contrast_column])
@@ -335,6 +416,158 @@ class MedicalDataProcessor:
 
         return df
 
+    def _flag_column(self, column, term_index, flag_table, regex):
+        """
+        Computes the binary flags of a column, as tokenize_and_flag_organs and
+        map_exam_to_binary_flag would for each value.
+
+        Referral columns repeat the same text many times, so the column is factorized once,
+        which also masks out missing values, and only the distinct non-missing values are
+        flagged before being broadcast back to the rows by their codes. The distinct values are
+        cleaned with pandas string methods, their tokens and multi-word matches are resolved to
+        term ids, and the ids' flags are OR-ed per value in one np.bitwise_or.at call.
+
+        Parameters:
+        ----------
+        column : pd.Series
+            The pandas Series containing the text to flag.
+        term_index : pd.Index
+            The terms, positioned by term id.
+        flag_table : np.ndarray
+            The binary flag of each term id, in the unsigned dtype used for the result.
+        regex : re.Pattern
+            The fused matcher for multi-word terms.
+
+        Returns:
+        -------
+        pd.Series
+            The binary flags as a nullable unsigned integer pandas Series of the flag table's width,
+            missing where the value was missing.
+        """
+        codes, uniques = pd.factorize(column)
+        present = codes >= 0
+        cleaned = pd.Series(uniques, dtype=object).map(str).str.replace('-', ' ', regex=False)
+        cleaned = cleaned.str.lower().str.replace(self._PUNCT_RE, '', regex=True)
+
+        # One row per token or multi-word match, labelled by the position of its unique value
+        matches = pd.concat([cleaned.str.split().explode(), cleaned.str.findall(regex).explode()])
+        term_ids = term_index.get_indexer(matches)
+        found = term_ids >= 0
+
+        flags = np.zeros(len(uniques), dtype=flag_table.dtype)
+        np.bitwise_or.at(flags, matches.index[found], flag_table[term_ids[found]])
+
+        row_flags = np.zeros(len(column), dtype=flag_table.dtype)
+        row_flags[present] = flags[codes[present]]
+        return pd.Series(pd.arrays.IntegerArray(row_flags, ~present), index=column.index)
+
+    def _process_data_parallel(self, df, exam_column, organ_column, contrast_column, n_jobs):
+        """
+        Runs process_data on row chunks in worker processes and writes the results back into df.
+
+        Parameters:
+        ----------
+        df : pd.DataFrame
+            The DataFrame containing medical examination data.
+        exam_column : str
+            The name of the column containing exam type data.
+        organ_column : str
+            The name of the column containing organ/body part data.
+        contrast_column : str
+            The name of the column containing contrast data.
+        n_jobs : int
+            Number of worker processes.
+
+        Returns:
+        -------
+        pd.DataFrame
+            The processed DataFrame with binary flag columns added.
+        """
+        chunk_size = -(-len(df) // n_jobs)
+        chunks = [df.iloc[start:start + chunk_size] for start in range(0, len(df), chunk_size)]
+        with ProcessPoolExecutor(max_workers=len(chunks)) as executor:
+            processed = pd.concat(executor.map(self.process_data, chunks, repeat(exam_column),
+                                               repeat(organ_column), repeat(contrast_column)))
+
+        # Keep process_data's in-place contract; chunks preserve row order, so the indexes align
+        for column in (exam_column + '_flags', organ_column + '_flags', contrast_column, contrast_column + '_flags'):
+            df[column] = processed[column]
+        return df
+
+    def process_data_gpu(self, df, exam_column, organ_column, contrast_column):
+        """
+        Applies the entire processing pipeline on the GPU using cuDF.
+
+        Produces the same flag columns as process_data, using cuDF string kernels for the
+        text matching. Requires the optional ``cudf`` package and a CUDA-capable GPU.
+
+        Parameters:
+        ----------
+        df : pd.DataFrame
+            The DataFrame containing medical examination data.
+        exam_column : str
+            The name of the column containing exam type data.
+        organ_column : str
+            The name of the column containing organ/body part data.
+        contrast_column : str
+            The name of the column containing contrast data.
+
+        Returns:
+        -------
+        pd.DataFrame
+            A new DataFrame with binary flag columns added; the input DataFrame is not modified.
+        """
+        import cudf
+
+        gdf = cudf.from_pandas(df)
+
+        # Apply exam and organ binary flags
+        gdf[exam_column + '_flags'] = self._flag_column_gpu(gdf[exam_column], self.exam_categories,
+                                                            self.categories_to_flags)
+        gdf[organ_column + '_flags'] = self._flag_column_gpu(gdf[organ_column], self.organ_clusters,
+                                                             self.cluster_tokens)
+
+        # Apply contrast standardization and binary flags; unmatched descriptions stay -1
+        contrast = gdf[contrast_column].astype('str').str.strip().str.lower()
+        contrast_flags = cudf.Series(np.full(len(gdf), -1, dtype=np.int8), index=gdf.index)
+        for flag, category in enumerate(self.contrast_categories):
+            contrast_flags[(contrast == category).fillna(False)] = flag
+        gdf[contrast_column] = contrast.astype(cudf.CategoricalDtype(categories=self.contrast_categories))
+        gdf[contrast_column + '_flags'] = contrast_flags
+
+        return gdf.to_pandas(nullable=True)
+
+    def _flag_column_gpu(self, column, groups, flags):
+        """
+        Computes binary flags for a cuDF string column with one regex search per group.
+
+        Parameters:
+        ----------
+        column : cudf.Series
+            The cuDF Series containing the text to flag.
+        groups : dict
+            Dictionary mapping group names to associated terms.
+        flags : dict
+            Dictionary mapping group names to their binary flag.
+
+        Returns:
+        -------
+        cudf.Series
+            The binary flags as an unsigned integer cuDF Series, as narrow as the flags allow,
+            null where the value was null.
+        """
+        # Same cleaning as the CPU path: hyphens to spaces, lower case, no punctuation
+        text = column.astype('str').str.replace('-', ' ', regex=False).str.lower()
+        text = text.str.replace(r"[^\w\s]", "", regex=True)
+
+        flag_dtype = np.min_scalar_type(sum(flags.values()))
+        binary_flag = None
+        for group, terms in groups.items():
+            pattern = r"\b(?:" + "|".join(re.escape(t) for t in sorted(terms, key=len, reverse=True)) + r")\b"
+            bits = text.str.contains(pattern, regex=True).fillna(False).astype(flag_dtype) * flags[group]
+            binary_flag = bits if binary_flag is None else binary_flag | bits
+        return binary_flag.astype(flag_dtype).where(column.notna())
+
 # Usage example:
 # processor = MedicalDataProcessor()
 # data = pd.read_csv('medical_data.csv')